@@ -0,0 +1,100 @@
+/*
+ * src/_dither.c
+ *
+ * Native Atkinson dithering kernel, loaded by image_processor.py via ctypes
+ * Same algorithm and edge handling as the Numba kernel in image_processor.py
+ *
+ * Build on the Pi (from the project root):
+ *     gcc -O3 -march=native -shared -fPIC -o src/_dither.so src/_dither.c
+ */
+
+#include <stdint.h>
+
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+#include <arm_neon.h>
+#endif
+
+/*
+ * Quantize one pixel and diffuse its error with full bounds checks
+ * Used for the edge pixels the unchecked inner loop skips
+ */
+static void atkinson_pixel(int16_t *buf, int y, int x, int h, int w)
+{
+    int16_t *row = buf + (long)y * w;
+    int old = row[x];
+    int new_pixel = (old > 128) ? 255 : 0;
+    /* Arithmetic shift: Atkinson divides by 8 */
+    int e = (old - new_pixel) >> 3;
+
+    row[x] = (int16_t)new_pixel;
+
+    if (x + 1 < w)
+        row[x + 1] += e;
+    if (x + 2 < w)
+        row[x + 2] += e;
+
+    if (y + 1 < h) {
+        if (x - 1 >= 0)
+            row[w + x - 1] += e;
+        row[w + x] += e;
+        if (x + 1 < w)
+            row[w + x + 1] += e;
+    }
+
+    if (y + 2 < h)
+        row[2 * w + x] += e;
+}
+
+/*
+ * Atkinson error diffusion over an int16 buffer of shape (h, w), in place
+ *
+ * Pattern:
+ *     X   1/8 1/8
+ * 1/8 1/8 1/8
+ *     1/8
+ */
+void atkinson(int16_t *buf, int h, int w)
+{
+    int x, y;
+
+    for (y = 0; y < h - 2; y++) {
+        int16_t *row = buf + (long)y * w;
+        int16_t *next = row + w;
+        int16_t *next2 = next + w;
+
+        /* Left edge has no x - 1 neighbour */
+        atkinson_pixel(buf, y, 0, h, w);
+
+        /* Interior: every neighbour is in bounds, no checks needed */
+        for (x = 1; x < w - 2; x++) {
+            int old = row[x];
+            int new_pixel = (old > 128) ? 255 : 0;
+            int e = (old - new_pixel) >> 3;
+
+            row[x] = (int16_t)new_pixel;
+            row[x + 1] += e;
+            row[x + 2] += e;
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+            {
+                /* x - 1 .. x + 1 in one add; lane 3 (x + 2) gets 0 */
+                int16x4_t err = {(int16_t)e, (int16_t)e, (int16_t)e, 0};
+                vst1_s16(next + x - 1, vadd_s16(vld1_s16(next + x - 1), err));
+            }
+#else
+            next[x - 1] += e;
+            next[x] += e;
+            next[x + 1] += e;
+#endif
+            next2[x] += e;
+        }
+
+        /* Right edge: last two columns */
+        for (x = (w - 2 > 1) ? w - 2 : 1; x < w; x++)
+            atkinson_pixel(buf, y, x, h, w);
+    }
+
+    /* Cleanup pass over the last two rows */
+    for (y = (h - 2 > 0) ? h - 2 : 0; y < h; y++)
+        for (x = 0; x < w; x++)
+            atkinson_pixel(buf, y, x, h, w);
+}
@@ -2,14 +2,13 @@
 
 import sys
 import os
+import mmap
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
 
-from waveshare_epd import epd4in2_V2
 from PIL import Image
+import numpy as np
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -19,12 +18,31 @@ class EInkDisplay:
     Handles all the low-level hardware communication
     """
     
-    def __init__(self):
-        """Initialize the display controller"""
+    # Driver default is 4 MHz; 10 MHz is fine with short wires to the HAT.
+    # If the panel shows noise or garbage, shorten the wiring or lower this.
+    SPI_SPEED_HZ = 10_000_000
+    SPI_FALLBACK_HZ = 8_000_000
+    
+    def __init__(self, spi_speed_hz=SPI_SPEED_HZ, full_refresh_every=10):
+        """
+        Initialize the display controller
+        
+        Args:
+            spi_speed_hz: SPI clock to use for pixel transfers
+            full_refresh_every: With partial updates, do a full refresh every
+                                N frames to clear ghosting
+        """
         self.epd = None
+        self._driver = None  # waveshare_epd.epd4in2_V2, imported in init()
+        self.spi_speed_hz = spi_speed_hz
+        self.full_refresh_every = full_refresh_every
+        self._frames_since_full = None  # None until the first full refresh
         self.width = 400
         self.height = 300
         self.initialized = False
+        
+        # All-white frame, reused by clear()
+        self._white_buffer = b'\xff' * (self.width * self.height // 8)
         logger.info("EInkDisplay controller created")
     
     def init(self):
@@ -33,10 +51,16 @@ class EInkDisplay:
         """
         try:
             if not self.epd:
+                # Imported here so this module loads on machines without
+                # the display hardware (the driver touches GPIO on import)
+                from waveshare_epd import epd4in2_V2
+                self._driver = epd4in2_V2
                 self.epd = epd4in2_V2.EPD()
             
             logger.info("Initializing e-paper display...")
             self.epd.init()
+            self._set_spi_speed()
+            self._frames_since_full = None
             self.initialized = True
             logger.info("Display initialized successfully")
             
@@ -44,6 +68,28 @@ class EInkDisplay:
             logger.error(f"Failed to initialize display: {e}")
             raise
     
+    def _set_spi_speed(self):
+        """
+        Raise the SPI clock after the driver has opened the bus
+        Falls back to SPI_FALLBACK_HZ, and leaves the driver default alone
+        on platforms without a spidev handle
+        """
+        spi = getattr(self._driver.epdconfig, 'SPI', None)
+        if not hasattr(spi, 'max_speed_hz'):
+            logger.info("No spidev handle, keeping driver SPI settings")
+            return
+        
+        for speed in (self.spi_speed_hz, self.SPI_FALLBACK_HZ):
+            try:
+                spi.max_speed_hz = speed
+                spi.mode = 0b00
+                logger.info(f"SPI clock set to {speed / 1e6:g} MHz")
+                return
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Could not set SPI clock to {speed} Hz: {e}")
+        
+        logger.warning("Keeping driver default SPI clock")
+    
     def clear(self):
         """
         Clear the display to white
@@ -54,20 +100,28 @@ class EInkDisplay:
                 logger.warning("Display not initialized, initializing now...")
                 self.init()
             
+            # Same sequence as epd.Clear() (white into both RAM planes, then
+            # refresh), but from a prebuilt bytes frame instead of a new list
             logger.info("Clearing display...")
-            self.epd.Clear()
+            self._restore_full_mode()
+            self.epd.display(self._white_buffer)
+            self._frames_since_full = 0
             logger.info("Display cleared")
             
         except Exception as e:
             logger.error(f"Failed to clear display: {e}")
             raise
     
-    def display_image(self, pil_image):
+    def display_image(self, image, partial=False):
         """
-        Display a PIL Image on the e-paper
+        Display an image on the e-paper
         
         Args:
-            pil_image: PIL Image object (should be 400x300, will be converted to 1-bit)
+            image: PIL Image object (should be 400x300, will be converted to 1-bit),
+                   or a pre-packed bytes-like buffer as produced by epd.getbuffer
+            partial: Use a partial update (no full waveform flash) when possible.
+                     The first frame after init and every full_refresh_every
+                     frames are still full refreshes.
         """
         try:
             # Make sure we're initialized
@@ -75,32 +129,91 @@ class EInkDisplay:
                 logger.warning("Display not initialized, initializing now...")
                 self.init()
             
-            # Check image size
-            if pil_image.size != (self.width, self.height):
-                logger.warning(
-                    f"Image size {pil_image.size} doesn't match display size "
-                    f"({self.width}x{self.height}). Image should be resized first."
-                )
-                # You could resize here, but it's better to handle in image_processor
-                raise ValueError(
-                    f"Image must be {self.width}x{self.height}, got {pil_image.size}"
-                )
+            if isinstance(image, Image.Image):
+                buffer = self._get_buffer(image)
+            else:
+                # Already packed, send it as-is
+                buffer_size = self.width * self.height // 8
+                if len(image) != buffer_size:
+                    raise ValueError(
+                        f"Buffer must be {buffer_size} bytes, got {len(image)}"
+                    )
+                buffer = image
+            
+            # spidev.writebytes2 sends buffer-protocol objects in one bulk
+            # transfer; anything else (e.g. a list) is converted up front
+            if not isinstance(buffer, (bytes, bytearray, memoryview, mmap.mmap)):
+                buffer = bytes(buffer)
             
-            # Ensure image is in 1-bit mode (black and white)
-            if pil_image.mode != '1':
-                logger.info(f"Converting image from {pil_image.mode} to 1-bit")
-                pil_image = pil_image.convert('1')
+            needs_full = (
+                not partial
+                or self._frames_since_full is None
+                or self._frames_since_full + 1 >= self.full_refresh_every
+            )
             
-            # Get buffer and display
-            logger.info("Sending image to display...")
-            buffer = self.epd.getbuffer(pil_image)
-            self.epd.display(buffer)
+            if needs_full:
+                logger.debug("Sending image to display...")
+                self._restore_full_mode()
+                self.epd.display(buffer)
+                self._frames_since_full = 0
+            else:
+                logger.debug("Sending image to display (partial update)...")
+                self.epd.display_Partial(buffer)
+                self._frames_since_full += 1
             logger.info("Image displayed successfully")
             
         except Exception as e:
             logger.error(f"Failed to display image: {e}")
             raise
     
+    def _restore_full_mode(self):
+        """
+        Undo display_Partial's register changes before a full refresh
+        display_Partial rewrites Display Update Control (0x21) and the border
+        waveform (0x3C); write back the values epd.init() sets. A full
+        epd.init() would also reopen SPI (leaking the old handle) and reset
+        the panel
+        """
+        if self._frames_since_full:
+            logger.debug("Restoring full refresh registers")
+            self.epd.send_command(0x21)  # Display update control
+            self.epd.send_data(0x40)
+            self.epd.send_data(0x00)
+            
+            self.epd.send_command(0x3C)  # Border waveform
+            self.epd.send_data(0x05)
+    
+    def _get_buffer(self, pil_image):
+        """
+        Pack a PIL Image into the display buffer format
+        
+        Args:
+            pil_image: PIL Image object (should be 400x300)
+            
+        Returns:
+            Display buffer for epd.display
+        """
+        # Check image size
+        if pil_image.size != (self.width, self.height):
+            logger.warning(
+                f"Image size {pil_image.size} doesn't match display size "
+                f"({self.width}x{self.height}). Image should be resized first."
+            )
+            # You could resize here, but it's better to handle in image_processor
+            raise ValueError(
+                f"Image must be {self.width}x{self.height}, got {pil_image.size}"
+            )
+        
+        # Ensure image is in 1-bit mode (black and white)
+        if pil_image.mode != '1':
+            logger.debug(f"Converting image from {pil_image.mode} to 1-bit")
+            pil_image = pil_image.convert('1')
+        
+        # Pack 8 pixels per byte, MSB first, white = 1 - the same layout as
+        # epd.getbuffer, but in C instead of a per-pixel Python loop
+        pixels = np.asarray(pil_image, dtype=np.uint8)
+        return np.packbits(pixels, axis=None, bitorder='big').tobytes()
+    
     def sleep(self):
         """
         Put the display into low power sleep mode
@@ -131,7 +244,7 @@ class EInkDisplay:
             
             # Clean up GPIO and SPI
             if self.epd:
-                epd4in2_V2.epdconfig.module_exit(cleanup=True)
+                self._driver.epdconfig.module_exit(cleanup=True)
                 logger.info("Display cleanup complete")
                 
         except Exception as e:
@@ -1,12 +1,150 @@
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 import numpy as np
+import ctypes
 import logging
 import os
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Use Numba to compile the Atkinson kernel to native code if available
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logger.warning("numba not installed, Atkinson dithering will run in pure Python")
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        def decorator(func):
+            return func
+        return decorator
+
+# Prefer the native C kernel when it has been built next to this module:
+#   gcc -O3 -march=native -shared -fPIC -o src/_dither.so src/_dither.c
+_dither_lib = None
+_dither_so = os.path.join(os.path.dirname(os.path.realpath(__file__)), '_dither.so')
+if os.path.exists(_dither_so):
+    try:
+        _dither_lib = ctypes.CDLL(_dither_so)
+        _dither_lib.atkinson.argtypes = [
+            ctypes.POINTER(ctypes.c_int16), ctypes.c_int, ctypes.c_int
+        ]
+        _dither_lib.atkinson.restype = None
+    except (OSError, AttributeError) as e:
+        logger.warning(f"Failed to load {_dither_so}, using fallback kernel: {e}")
+        _dither_lib = None
+
+
+@njit(cache=True)
+def _atkinson_pixel(buf, y, x, h, w):
+    """
+    Quantize one pixel and diffuse its error with full bounds checks
+    Used for the edge pixels the unchecked inner loop skips
+    """
+    old_pixel = buf[y, x]
+    new_pixel = 255 if old_pixel > 128 else 0
+    buf[y, x] = new_pixel
+    error = (old_pixel - new_pixel) >> 3  # Atkinson divides by 8
+    
+    if x + 1 < w:
+        buf[y, x + 1] += error
+    if x + 2 < w:
+        buf[y, x + 2] += error
+    
+    if y + 1 < h:
+        if x - 1 >= 0:
+            buf[y + 1, x - 1] += error
+        buf[y + 1, x] += error
+        if x + 1 < w:
+            buf[y + 1, x + 1] += error
+    
+    if y + 2 < h:
+        buf[y + 2, x] += error
+
+
+@njit(cache=True, fastmath=True)
+def _atkinson_numba(buf, h, w):
+    """
+    Atkinson error diffusion over an int16 buffer, in place
+    
+    Args:
+        buf: Contiguous int16 numpy array of shape (h, w)
+        h: Buffer height in pixels
+        w: Buffer width in pixels
+    """
+    # Atkinson dithering distributes error to 6 neighboring pixels
+    # Pattern:
+    #     X   1/8 1/8
+    # 1/8 1/8 1/8
+    #     1/8
+    
+    for y in range(h - 2):
+        # Left edge has no x - 1 neighbour
+        _atkinson_pixel(buf, y, 0, h, w)
+        
+        # Interior: every neighbour is in bounds, no checks needed
+        for x in range(1, w - 2):
+            old_pixel = buf[y, x]
+            new_pixel = 255 if old_pixel > 128 else 0
+            buf[y, x] = new_pixel
+            error = (old_pixel - new_pixel) >> 3
+            
+            buf[y, x + 1] += error
+            buf[y, x + 2] += error
+            buf[y + 1, x - 1] += error
+            buf[y + 1, x] += error
+            buf[y + 1, x + 1] += error
+            buf[y + 2, x] += error
+        
+        # Right edge: last two columns
+        for x in range(max(w - 2, 1), w):
+            _atkinson_pixel(buf, y, x, h, w)
+    
+    # Cleanup pass over the last two rows
+    for y in range(max(h - 2, 0), h):
+        for x in range(w):
+            _atkinson_pixel(buf, y, x, h, w)
+
+
+def _apply_enhancement(enhancer_cls, img, factor):
+    """
+    Apply an ImageEnhance adjustment, skipping factors that are effectively 1.0
+    
+    Args:
+        enhancer_cls: ImageEnhance class (Contrast, Brightness, Sharpness)
+        img: PIL Image object
+        factor: Enhancement factor (1.0 = no change)
+        
+    Returns:
+        PIL Image object
+    """
+    if abs(factor - 1.0) < 1e-3:
+        return img
+    return enhancer_cls(img).enhance(factor)
+
+
+# Names accepted as dither_mode (the keys of ImageProcessor._ditherers),
+# so callers can validate settings without building a processor
+DITHER_MODES = frozenset({'floyd-steinberg', 'atkinson', 'ordered', 'threshold'})
+
+
+def _pil_ditherer(method):
+    """
+    Build a dither function around PIL's built-in 1-bit conversion
+    
+    Args:
+        method: PIL dither constant (Image.FLOYDSTEINBERG, ORDERED or NONE)
+        
+    Returns:
+        Function taking a PIL 'L' image or uint8 array, returning a '1' image
+    """
+    def dither(img):
+        if isinstance(img, np.ndarray):
+            img = Image.fromarray(img, 'L')
+        return img.convert('1', dither=method)
+    return dither
+
 
 class ImageProcessor:
     """
@@ -14,27 +152,45 @@ class ImageProcessor:
     Handles resizing, dithering, and aesthetic adjustments
     """
     
-    def __init__(self, target_width=400, target_height=300):
+    def __init__(self, target_width=400, target_height=300,
+                 dither_mode='floyd-steinberg'):
         """
         Initialize the image processor
         
         Args:
             target_width: Display width in pixels
             target_height: Display height in pixels
+            dither_mode: Default dithering algorithm (see process_image)
+        
+        Raises:
+            ValueError: If dither_mode is not a known algorithm
         """
         self.width = target_width
         self.height = target_height
+        
+        # Resolve the dithering function once instead of per image
+        self._ditherers = {
+            'floyd-steinberg': _pil_ditherer(Image.FLOYDSTEINBERG),
+            'atkinson': self._atkinson_dither,
+            'ordered': _pil_ditherer(Image.ORDERED),
+            'threshold': _pil_ditherer(Image.NONE),
+        }
+        if dither_mode not in DITHER_MODES:
+            raise ValueError(f"Unknown dither mode '{dither_mode}'")
+        self.dither_mode = dither_mode
+        self._dither = self._ditherers[dither_mode]
         logger.info(f"ImageProcessor initialized for {self.width}x{self.height} display")
     
-    def process_image(self, image_path, dither_mode='floyd-steinberg', 
+    def process_image(self, image_path, dither_mode=None, 
                      contrast=1.2, brightness=1.0, sharpness=1.0):
         """
         Process an image for e-ink display
         
         Args:
             image_path: Path to the source image file
-            dither_mode: Dithering algorithm to use:
-                        'floyd-steinberg' (default, smooth gradients)
+            dither_mode: Dithering algorithm to use, None for the one
+                        given to the constructor:
+                        'floyd-steinberg' (smooth gradients)
                         'atkinson' (retro Mac look)
                         'ordered' (pattern-based)
                         'threshold' (no dithering, pure B&W)
@@ -48,118 +204,156 @@ class ImageProcessor:
         try:
             logger.info(f"Processing image: {image_path}")
             
-            # Load image
-            if not os.path.exists(image_path):
-                raise FileNotFoundError(f"Image not found: {image_path}")
-            
-            img = Image.open(image_path)
-            logger.info(f"Loaded image: {img.size}, mode: {img.mode}")
-            
-            # Convert to RGB if needed (handles RGBA, P, etc.)
-            if img.mode not in ('RGB', 'L'):
-                logger.info(f"Converting from {img.mode} to RGB")
-                img = img.convert('RGB')
-            
-            # Resize to fit display while maintaining aspect ratio
-            img = self._resize_maintain_aspect(img)
-            logger.info(f"Resized to {img.size}")
-            
-            # Apply enhancements before dithering
-            if contrast != 1.0:
-                enhancer = ImageEnhance.Contrast(img)
-                img = enhancer.enhance(contrast)
-                logger.info(f"Applied contrast: {contrast}")
-            
-            if brightness != 1.0:
-                enhancer = ImageEnhance.Brightness(img)
-                img = enhancer.enhance(brightness)
-                logger.info(f"Applied brightness: {brightness}")
-            
-            if sharpness != 1.0:
-                enhancer = ImageEnhance.Sharpness(img)
-                img = enhancer.enhance(sharpness)
-                logger.info(f"Applied sharpness: {sharpness}")
-            
-            # Convert to grayscale
-            img = img.convert('L')
-            logger.info("Converted to grayscale")
-            
-            # Apply dithering
-            img = self._apply_dithering(img, dither_mode)
-            logger.info(f"Applied {dither_mode} dithering")
+            img = self.prepare_enhanced(image_path, contrast, brightness, sharpness)
+            img = self.apply_dither(img, dither_mode)
             
-            logger.info("Image processing complete")
+            logger.debug("Image processing complete")
             return img
             
         except Exception as e:
             logger.error(f"Failed to process image: {e}")
             raise
     
-    def _resize_maintain_aspect(self, img):
+    def prepare_enhanced(self, image_path, contrast=1.2, brightness=1.0, sharpness=1.0):
         """
-        Resize image to fit display while maintaining aspect ratio
-        Centers the image on a white background if needed
+        Load, resize, enhance and letterbox an image, everything up to dithering
+        The result can be dithered several ways with apply_dither
         
         Args:
-            img: PIL Image object
-            
+            image_path: Path to the source image file
+            contrast: Contrast adjustment (1.0 = no change)
+            brightness: Brightness adjustment (1.0 = no change)
+            sharpness: Sharpness adjustment (1.0 = no change)
+        
         Returns:
-            PIL Image object (400x300)
+            Display-sized grayscale frame (PIL 'L' image or uint8 numpy array),
+            or the image itself if it is already a 1-bit display-sized frame
         """
-        # Calculate aspect ratios
-        img_ratio = img.width / img.height
-        target_ratio = self.width / self.height
-        
-        if img_ratio > target_ratio:
-            # Image is wider - fit to width
-            new_width = self.width
-            new_height = int(self.width / img_ratio)
-        else:
-            # Image is taller - fit to height
-            new_height = self.height
-            new_width = int(self.height * img_ratio)
+        # Load image
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image not found: {image_path}")
         
-        # Resize with high-quality resampling
-        img = img.resize((new_width, new_height), Image.LANCZOS)
+        img = Image.open(image_path)
+        logger.debug(f"Loaded image: {img.size}, mode: {img.mode}")
         
-        # Create white canvas and paste centered image
-        canvas = Image.new('RGB', (self.width, self.height), 'white')
-        offset_x = (self.width - new_width) // 2
-        offset_y = (self.height - new_height) // 2
-        canvas.paste(img, (offset_x, offset_y))
+        # Already a display-ready frame, nothing to do
+        if img.mode == '1' and img.size == (self.width, self.height):
+            logger.debug("Image is already 1-bit at display size, skipping processing")
+            return img
         
-        return canvas
+        # Convert to RGB if needed (handles RGBA, P, etc.)
+        if img.mode not in ('RGB', 'L'):
+            logger.debug(f"Converting from {img.mode} to RGB")
+            img = img.convert('RGB')
+        
+        # Much larger than the display: go to grayscale first so the
+        # resize filters one channel instead of three
+        if img.mode != 'L' and (img.width > 2 * self.width or
+                                img.height > 2 * self.height):
+            img = img.convert('L')
+            logger.debug("Converted to grayscale before resize")
+        
+        # Resize to fit display while maintaining aspect ratio
+        img = self._resize_maintain_aspect(img)
+        logger.debug(f"Resized to {img.size}")
+        
+        # Convert to grayscale now so the enhancements work on one channel
+        if img.mode != 'L':
+            img = img.convert('L')
+            logger.debug("Converted to grayscale")
+        
+        # Apply enhancements before dithering (only the image itself,
+        # the letterbox border stays white)
+        img = _apply_enhancement(ImageEnhance.Contrast, img, contrast)
+        img = _apply_enhancement(ImageEnhance.Brightness, img, brightness)
+        img = _apply_enhancement(ImageEnhance.Sharpness, img, sharpness)
+        logger.debug(
+            f"Applied contrast: {contrast}, brightness: {brightness}, "
+            f"sharpness: {sharpness}"
+        )
+        
+        # Center on a white display-sized canvas if it doesn't fill it
+        img = self._letterbox(img)
+        
+        return img
     
-    def _apply_dithering(self, img, dither_mode):
+    def apply_dither(self, img, dither_mode=None):
         """
-        Apply dithering algorithm to grayscale image
+        Dither a frame from prepare_enhanced to 1-bit
         
         Args:
-            img: PIL Image in 'L' (grayscale) mode
-            dither_mode: Dithering algorithm name
+            img: PIL Image in 'L' (grayscale) mode, or a uint8 numpy array
+            dither_mode: Dithering algorithm name, None for the one given
+                         to the constructor
             
         Returns:
             PIL Image in '1' (1-bit B&W) mode
         """
-        if dither_mode == 'floyd-steinberg':
-            # Built-in Floyd-Steinberg dithering (smooth, natural)
-            return img.convert('1', dither=Image.FLOYDSTEINBERG)
+        # Display-ready input from prepare_enhanced's fast path
+        if isinstance(img, Image.Image) and img.mode == '1':
+            return img
         
-        elif dither_mode == 'atkinson':
-            # Atkinson dithering (retro Mac aesthetic)
-            return self._atkinson_dither(img)
+        if dither_mode is None:
+            img = self._dither(img)
+            logger.debug(f"Applied {self.dither_mode} dithering")
+            return img
+        
+        dither = self._ditherers.get(dither_mode)
+        if dither is None:
+            logger.warning(f"Unknown dither mode '{dither_mode}', using floyd-steinberg")
+            dither = self._ditherers['floyd-steinberg']
         
-        elif dither_mode == 'ordered':
-            # Ordered dithering (pattern-based)
-            return img.convert('1', dither=Image.ORDERED)
+        img = dither(img)
+        logger.debug(f"Applied {dither_mode} dithering")
+        return img
+    
+    def _resize_maintain_aspect(self, img):
+        """
+        Resize image to fit within the display while maintaining aspect ratio
         
-        elif dither_mode == 'threshold':
-            # No dithering, pure threshold
-            return img.convert('1', dither=Image.NONE)
+        Args:
+            img: PIL Image object
+            
+        Returns:
+            PIL Image object no larger than 400x300 (letterboxed later)
+        """
+        if img.size == (self.width, self.height):
+            return img
         
+        # Pick the resampler by how much we shrink. Dithering to 1-bit
+        # throws away fine detail anyway, so LANCZOS only pays off on large
+        # downscales; upscaled pixels are just magnified
+        scale = max(img.width / self.width, img.height / self.height)
+        if scale > 2.0:
+            method = Image.LANCZOS
+        elif scale >= 1.0:
+            method = Image.BILINEAR
         else:
-            logger.warning(f"Unknown dither mode '{dither_mode}', using floyd-steinberg")
-            return img.convert('1', dither=Image.FLOYDSTEINBERG)
+            method = Image.NEAREST
+        
+        return ImageOps.contain(img, (self.width, self.height), method=method)
+    
+    def _letterbox(self, img):
+        """
+        Center a resized grayscale image on a white display-sized canvas
+        
+        Args:
+            img: PIL Image in 'L' mode from _resize_maintain_aspect
+            
+        Returns:
+            img itself if it already fills the display, otherwise a
+            (height, width) uint8 numpy array
+        """
+        if img.size == (self.width, self.height):
+            return img
+        
+        # One allocation for the canvas, image copied straight into place
+        canvas = np.full((self.height, self.width), 255, dtype=np.uint8)
+        x0 = (self.width - img.width) // 2
+        y0 = (self.height - img.height) // 2
+        np.copyto(canvas[y0:y0 + img.height, x0:x0 + img.width], np.asarray(img))
+        
+        return canvas
     
     def _atkinson_dither(self, img):
         """
@@ -167,46 +361,26 @@ class ImageProcessor:
         Creates a distinctive retro look (like old Macintosh computers)
         
         Args:
-            img: PIL Image in 'L' (grayscale) mode
+            img: PIL Image in 'L' (grayscale) mode, or a uint8 numpy array
             
         Returns:
             PIL Image in '1' (1-bit B&W) mode
         """
-        # Convert to numpy array for pixel manipulation
-        img_array = np.array(img, dtype=float)
+        # Integer working buffer (values stay well inside int16 range)
+        img_array = np.asarray(img, dtype=np.int16)
         height, width = img_array.shape
         
-        # Atkinson dithering distributes error to 6 neighboring pixels
-        # Pattern:
-        #     X   1/8 1/8
-        # 1/8 1/8 1/8
-        #     1/8
-        
-        for y in range(height - 2):
-            for x in range(1, width - 2):
-                old_pixel = img_array[y, x]
-                new_pixel = 255 if old_pixel > 128 else 0
-                img_array[y, x] = new_pixel
-                
-                # Calculate quantization error
-                error = (old_pixel - new_pixel) / 8  # Atkinson divides by 8
-                
-                # Distribute error to neighboring pixels
-                if x + 1 < width:
-                    img_array[y, x + 1] += error
-                if x + 2 < width:
-                    img_array[y, x + 2] += error
-                
-                if y + 1 < height:
-                    if x - 1 >= 0:
-                        img_array[y + 1, x - 1] += error
-                    img_array[y + 1, x] += error
-                    if x + 1 < width:
-                        img_array[y + 1, x + 1] += error
-                
-                if y + 2 < height:
-                    img_array[y + 2, x] += error
-        
-        # Clip values and convert back to PIL Image
-        img_array = np.clip(img_array, 0, 255).astype('uint8')
-        return Image.fromarray(img_array).convert('1')
\ No newline at end of file
+        if _dither_lib is not None:
+            # Zero-copy: the C kernel works directly on the numpy buffer
+            _dither_lib.atkinson(
+                img_array.ctypes.data_as(ctypes.POINTER(ctypes.c_int16)),
+                height, width
+            )
+        else:
+            _atkinson_numba(img_array, height, width)
+        
+        # Every pixel has been quantized to exactly 0 or 255 (error only ever
+        # flows to pixels not yet visited), so no clip is needed and the
+        # 1-bit conversion is a plain threshold
+        img_array = img_array.astype(np.uint8)
+        return Image.fromarray(img_array).convert('1', dither=Image.NONE)
\ No newline at end of file
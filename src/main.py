@@ -6,8 +6,10 @@ import json
 import time
 import signal
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from pathlib import Path
-import RPi.GPIO as GPIO
 import json
 
 # Add src to path
@@ -72,14 +74,30 @@ class PictureFrame:
             sharpness=self.config['processing']['sharpness']
         )
         
-        self.display = EInkDisplay()
+        self.display = EInkDisplay(
+            full_refresh_every=self.config['display']['full_refresh_every']
+        )
+        
+        # Prepares the next image while the current one is on screen
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._prefetch = None
         
         self.running = False
         self.interval = self.config['display']['interval_seconds']
         
         # Button setup (GPIO 18, physical pin 12)
         self.button_pin = 18
+        self.debounce_ms = self.config['button']['debounce_ms']
+        self._debounce_ns = self.debounce_ms * 1_000_000
+        self._last_press_ns = 0
         self.button_initialized = False
+        self._GPIO = None  # RPi.GPIO fallback, imported in _setup_button()
+        self._button_request = None  # gpiod line request
+        self._button_thread = None
+        self._button_stop = threading.Event()
+        
+        # Set by the button (or shutdown) to end the current wait early
+        self._skip_event = threading.Event()
         
         # Setup signal handlers for clean shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -106,23 +124,80 @@ class PictureFrame:
             raise
     
     def _setup_button(self):
-        """Simple button setup with polling"""
+        """Button setup with edge detection (libgpiod, or RPi.GPIO if unavailable)"""
         try:
-            GPIO.setwarnings(False)
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setup(self.button_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            try:
+                self._setup_button_gpiod()
+            except ImportError:
+                logger.info("gpiod not installed, using RPi.GPIO for the button")
+                self._setup_button_rpi_gpio()
             self.button_initialized = True
             logger.info(f"Button setup complete on GPIO {self.button_pin}")
         except Exception as e:
             logger.error(f"Failed to setup button: {e}")
             logger.warning("Continuing without button functionality")
     
-    def _is_button_pressed(self):
-        """Check if button is currently pressed"""
-        if not self.button_initialized:
-            return False
-        # Button connects to ground, so pressed = LOW (0)
-        return GPIO.input(self.button_pin) == 0
+    def _setup_button_gpiod(self):
+        """Request the button line with kernel edge detection and debounce"""
+        # Imported here so the app can be loaded on machines without GPIO
+        import gpiod
+        from gpiod.line import Bias, Direction, Edge
+        
+        # Button connects to ground, so a press is a falling edge
+        self._button_request = gpiod.request_lines(
+            '/dev/gpiochip0',
+            consumer='picture_frame',
+            config={
+                self.button_pin: gpiod.LineSettings(
+                    direction=Direction.INPUT,
+                    bias=Bias.PULL_UP,
+                    edge_detection=Edge.FALLING,
+                    debounce_period=timedelta(milliseconds=self.debounce_ms)
+                )
+            }
+        )
+        
+        self._button_thread = threading.Thread(
+            target=self._watch_button, name='button', daemon=True
+        )
+        self._button_thread.start()
+    
+    def _setup_button_rpi_gpio(self):
+        """Fallback button setup using RPi.GPIO edge detection"""
+        import RPi.GPIO as GPIO
+        self._GPIO = GPIO
+        
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(self.button_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        GPIO.add_event_detect(
+            self.button_pin, GPIO.FALLING,
+            callback=self._button_pressed,
+            bouncetime=self.debounce_ms
+        )
+    
+    def _watch_button(self):
+        """Button thread: block on gpiod edge events until shutdown"""
+        while not self._button_stop.is_set():
+            try:
+                if self._button_request.wait_edge_events(timedelta(seconds=1)):
+                    for event in self._button_request.read_edge_events():
+                        self._button_pressed(event.line_offset)
+            except Exception as e:
+                if not self._button_stop.is_set():
+                    logger.error(f"Button watcher stopped: {e}")
+                break
+    
+    def _button_pressed(self, channel):
+        """Button callback, runs on the button/GPIO event thread"""
+        # Software debounce on top of the kernel/RPi.GPIO one, on the
+        # monotonic clock so NTP steps can't cause double skips
+        now = time.monotonic_ns()
+        if now - self._last_press_ns < self._debounce_ns:
+            return
+        self._last_press_ns = now
+        
+        self._skip_event.set()
     
     def start(self):
         """Start the picture frame slideshow"""
@@ -189,9 +264,9 @@ class PictureFrame:
         
         while self.running:
             try:
-                # Rescan for new images every loop iteration
+                # Rescan for new images when the queue directory changes
                 current_count = self.slideshow.get_image_count()
-                new_count = self.slideshow.scan_images()
+                new_count = self.slideshow.rescan_if_changed()
                 if new_count != current_count:
                     logger.info(f"Found {new_count - current_count} new images!")
         
@@ -204,11 +279,11 @@ class PictureFrame:
                 
                 logger.info(f"Displaying: {Path(image_path).name}")
                 
-                # Process image
-                processed_img = self.transfer.get_processed_image(image_path)
+                # Process image (packed display buffer, cached on disk)
+                buffer = self._get_display_buffer(image_path)
                 
                 # Display on e-ink
-                self.display.display_image(processed_img)
+                self.display.display_image(buffer, partial=True)
                 logger.info(f"Image {self.slideshow.get_current_index()}/{self.slideshow.get_image_count()} displayed")
                 logger.info(f"Waiting {self.interval} seconds until next image...")
                 
@@ -216,20 +291,18 @@ class PictureFrame:
                 self._save_state(image_path)
                 logger.info(f"Image {self.slideshow.get_current_index()}/{self.slideshow.get_image_count()} displayed")
                 
+                # Start processing the next image during the wait
+                next_path = self.slideshow.peek_next()
+                if next_path:
+                    self._prefetch = (
+                        next_path,
+                        self._executor.submit(self.transfer.get_display_buffer, next_path)
+                    )
 
-
-                # Wait for interval, checking button every second
-                for i in range(self.interval):
-                    if not self.running:
-                        break
-                    
-                    # Check if button is pressed
-                    if self._is_button_pressed():
-                        logger.info("Button pressed - skipping to next image!")
-                        time.sleep(0.3)  # Simple debounce - wait for release
-                        break
-                    
-                    time.sleep(1)
+                # Wait for interval, or until the button is pressed
+                if self._skip_event.wait(timeout=self.interval) and self.running:
+                    logger.info("Button pressed - skipping to next image!")
+                self._skip_event.clear()
                 
             except KeyboardInterrupt:
                 logger.info("Keyboard interrupt received")
@@ -241,14 +314,38 @@ class PictureFrame:
         
         self.shutdown()
     
+    def _get_display_buffer(self, image_path):
+        """Get display buffer for an image, using the prefetched one if it matches"""
+        prefetch, self._prefetch = self._prefetch, None
+        
+        if prefetch and prefetch[0] == image_path:
+            try:
+                return prefetch[1].result()
+            except Exception as e:
+                logger.warning(f"Prefetch failed, processing again: {e}")
+        
+        # Through the prefetch worker too, so a stale prefetch that is still
+        # running never shares self.transfer with this thread
+        return self._executor.submit(self.transfer.get_display_buffer, image_path).result()
+    
     def shutdown(self):
         """Clean shutdown of picture frame"""
         logger.info("Shutting down picture frame...")
         self.running = False
+        self._skip_event.set()
+        
+        self._executor.shutdown(wait=False, cancel_futures=True)
         
         try:
             if self.button_initialized:
-                GPIO.cleanup(self.button_pin)
+                self.button_initialized = False
+                if self._button_request is not None:
+                    self._button_stop.set()
+                    self._button_thread.join(timeout=2)
+                    self._button_request.release()
+                    self._button_request = None
+                else:
+                    self._GPIO.cleanup(self.button_pin)
                 logger.info("Button GPIO cleaned up")
         except Exception as e:
             logger.error(f"Error cleaning up button: {e}")
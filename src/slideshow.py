@@ -1,4 +1,5 @@
 import os
+import threading
 from pathlib import Path
 import logging
 
@@ -22,6 +23,7 @@ class Slideshow:
         self.loop = loop
         self.image_list = []
         self.current_index = 0
+        self._dir_mtime = None  # Directory mtime at the last scan
         
         logger.info(f"Slideshow initialized: dir={image_dir}, loop={loop}")
     
@@ -41,20 +43,54 @@ class Slideshow:
             self.image_dir.mkdir(parents=True, exist_ok=True)
             return 0
         
-        # Find all image files
-        self.image_list = [
-            f for f in self.image_dir.iterdir()
-            if f.is_file() and f.suffix.lower() in valid_extensions
-        ]
+        # Taken before listing so a change during the scan triggers a rescan
+        self._dir_mtime = self.image_dir.stat().st_mtime_ns
         
-        # Sort alphabetically
-        self.image_list.sort()
+        # Find all image files (scandir entries know their type without a stat)
+        with os.scandir(self.image_dir) as entries:
+            self.image_list = sorted(
+                Path(entry.path) for entry in entries
+                if entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in valid_extensions
+            )
         
         logger.info(f"Scanned {len(self.image_list)} images from {self.image_dir}")
         
         return len(self.image_list)
     
+    def prefetch(self):
+        """
+        Ask the kernel to start reading the queued images into the page cache
+        (runs in a background thread, returns immediately)
+        
+        Returns:
+            The started thread, or None if posix_fadvise isn't available
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return None
+        
+        thread = threading.Thread(target=_fadvise_willneed, args=(list(self.image_list),),
+                                  daemon=True)
+        thread.start()
+        return thread
     
+    def rescan_if_changed(self):
+        """
+        Rescan the image directory only if it changed since the last scan
+        (adding, removing or renaming a file updates the directory mtime)
+        
+        Returns:
+            Number of images
+        """
+        try:
+            dir_mtime = self.image_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        
+        if dir_mtime is None or dir_mtime != self._dir_mtime:
+            return self.scan_images()
+        
+        return len(self.image_list)
     
     def get_next_image(self):
         """
@@ -72,6 +108,10 @@ class Slideshow:
             logger.warning("No images available in queue")
             return None
         
+        # List may have shrunk since the last rescan
+        if self.current_index >= len(self.image_list):
+            self.current_index = 0
+        
         # Get current image
         image_path = str(self.image_list[self.current_index])
         
@@ -83,12 +123,61 @@ class Slideshow:
             if self.loop:
                 logger.info("Reached end of slideshow, looping back to start")
                 self.current_index = 0
+                self.rescan_if_changed()
             else:
                 logger.info("Reached end of slideshow")
                 return None
         
         return image_path
     
+    def get_next_images(self, n):
+        """
+        Get the next n images in one call and advance past them
+        
+        Args:
+            n: Number of images to return
+            
+        Returns:
+            List of paths (str). Wraps around when looping, otherwise
+            stops at the end of the list
+        """
+        if not self.image_list:
+            self.scan_images()
+        
+        if not self.image_list:
+            logger.warning("No images available in queue")
+            return []
+        
+        images = self.image_list
+        total = len(images)
+        index = self.current_index
+        
+        if self.loop:
+            # List may have shrunk since the last rescan
+            if index >= total:
+                index = 0
+            batch = [str(images[(index + i) % total]) for i in range(n)]
+            self.current_index = (index + n) % total
+            if index + n >= total:
+                logger.info("Reached end of slideshow, looping back to start")
+                self.rescan_if_changed()
+        else:
+            batch = [str(path) for path in images[index:index + n]]
+            self.current_index = min(index + n, total)
+        
+        return batch
+    
+    def peek_next(self):
+        """
+        Get the path get_next_image will return next, without advancing
+        
+        Returns:
+            Path to next image (str), or None if no images available
+        """
+        if self.current_index >= len(self.image_list):
+            return None
+        return str(self.image_list[self.current_index])
+    
     def reset(self):
         """Reset to beginning of slideshow"""
         self.current_index = 0
@@ -100,4 +189,19 @@ class Slideshow:
     
     def get_current_index(self):
         """Get current position in slideshow"""
-        return self.current_index
\ No newline at end of file
+        return self.current_index
+
+
+def _fadvise_willneed(paths):
+    """Hint that each file will be read soon so readahead starts now"""
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -1,9 +1,24 @@
 import os
+import functools
+from collections import OrderedDict
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import tempfile
+import sqlite3
+import struct
 from pathlib import Path
 import logging
 import hashlib
+import numpy as np
 from PIL import Image
 
+logger = logging.getLogger(__name__)
+
+# Processed image cache file header: width, height, PIL mode; raw pixels follow
+FRAME_HEADER = struct.Struct('<II8s')
+
 # Register HEIC support
 try:
     from pillow_heif import register_heif_opener
@@ -11,11 +26,9 @@ try:
     HEIC_SUPPORTED = True
 except ImportError:
     HEIC_SUPPORTED = False
-    logging.warning("pillow-heif not installed, HEIC files will not be supported")
-
-from image_processor import ImageProcessor
+    logger.warning("pillow-heif not installed, HEIC files will not be supported")
 
-logger = logging.getLogger(__name__)
+from image_processor import ImageProcessor, DITHER_MODES
 
 
 class ImageTransfer:
@@ -24,8 +37,15 @@ class ImageTransfer:
     Caches processed images to avoid reprocessing
     """
     
+    # Decoded images kept in memory (1-bit 400x300 frames are ~15 KB each)
+    MEM_CACHE_SIZE = 32
+    
+    # Bytes of the source file hashed for the processed image cache key
+    CONTENT_KEY_BYTES = 64 * 1024
+    
     def __init__(self, queue_dir='images/queue', processed_dir='images/processed',
-                 dither_mode='atkinson', contrast=1.2, brightness=1.0, sharpness=1.0):
+                 dither_mode='atkinson', contrast=1.2, brightness=1.0, sharpness=1.0,
+                 target_width=400, target_height=300):
         """
         Initialize the image transfer manager
         
@@ -36,22 +56,55 @@ class ImageTransfer:
             contrast: Contrast adjustment
             brightness: Brightness adjustment
             sharpness: Sharpness adjustment
+            target_width: Display width in pixels
+            target_height: Display height in pixels
+        
+        Raises:
+            ValueError: If dither_mode is not a known algorithm
         """
+        # The processor is only built on the first cache miss, check the
+        # mode now so a bad config fails at startup
+        if dither_mode not in DITHER_MODES:
+            raise ValueError(f"Unknown dither mode '{dither_mode}'")
+        
         self.queue_dir = Path(queue_dir)
         self.processed_dir = Path(processed_dir)
-        self.processor = ImageProcessor()
         
         # Processing settings
+        self.width = target_width
+        self.height = target_height
         self.dither_mode = dither_mode
         self.contrast = contrast
         self.brightness = brightness
         self.sharpness = sharpness
         
+        # (source path, source mtime_ns) -> decoded PIL Image, LRU order
+        self._mem_cache = OrderedDict()
+        
         # Create processed directory if it doesn't exist
         self.processed_dir.mkdir(parents=True, exist_ok=True)
         
+        # Manifest of cache files, so lookups and clear_cache don't have to
+        # hash sources or scan processed_dir. Shared with the prefetch thread
+        self._db = sqlite3.connect(self.processed_dir / 'cache.db',
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, filename TEXT NOT NULL, "
+            "src_mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buffers (filename TEXT PRIMARY KEY)"
+        )
+        
         logger.info(f"ImageTransfer initialized: queue={queue_dir}, processed={processed_dir}")
     
+    @functools.cached_property
+    def processor(self):
+        """ImageProcessor, only created once an image actually needs processing"""
+        return ImageProcessor(target_width=self.width, target_height=self.height,
+                              dither_mode=self.dither_mode)
+    
     def get_processed_image(self, source_path):
         """
         Get processed version of an image (from cache or by processing)
@@ -62,44 +115,247 @@ class ImageTransfer:
         Returns:
             PIL Image object ready for display
         """
-        source_path = Path(source_path)
+        # Plain str paths here, this runs on every slideshow tick
+        source_path = os.fspath(source_path)
+        source_name = os.path.basename(source_path)
+        source_st = os.stat(source_path)
+        
+        # Already decoded this version of the image
+        mem_key = (source_path, source_st.st_mtime_ns)
+        cached_img = self._mem_cache.get(mem_key)
+        if cached_img is not None:
+            self._mem_cache.move_to_end(mem_key)
+            logger.debug(f"Using in-memory processed image: {source_name}")
+            return cached_img.copy()
+        
+        # Manifest says which cache file belongs to this unchanged source
+        entry = self._db.execute(
+            "SELECT filename, src_mtime_ns, size FROM entries WHERE key = ?",
+            (self._entry_key(source_path),)
+        ).fetchone()
+        if entry is not None and entry[1:] == (source_st.st_mtime_ns, source_st.st_size):
+            try:
+                with open(os.path.join(self.processed_dir, entry[0]), 'rb') as f:
+                    cached_img = _read_frame(f)
+                logger.info(f"Using cached processed image: {entry[0]}")
+                self._remember(mem_key, cached_img)
+                return cached_img.copy()
+            except (FileNotFoundError, ValueError, struct.error):
+                pass  # Removed or damaged, look it up by content below
         
         # Generate cache filename based on source file hash
         cache_filename = self._get_cache_filename(source_path)
-        cache_path = self.processed_dir / cache_filename
+        cache_path = os.path.join(self.processed_dir, cache_filename)
         
-        # Check if processed version exists and is up to date
-        if cache_path.exists():
-            # Check if source has been modified since cache was created
-            source_mtime = source_path.stat().st_mtime
-            cache_mtime = cache_path.stat().st_mtime
-            
-            if cache_mtime >= source_mtime:
-                logger.info(f"Using cached processed image: {cache_filename}")
-                return Image.open(cache_path)
-            else:
-                logger.info(f"Cache outdated, reprocessing: {source_path.name}")
-        else:
-            logger.info(f"Processing new image: {source_path.name}")
+        # Check if processed version exists and is up to date. The cache is
+        # opened once, fstat'ed and then mapped from the same descriptor.
+        # Cache files carry their source's mtime (see _save_processed_image),
+        # so any change to the source, even to an older mtime, invalidates it
+        try:
+            cache_file = open(cache_path, 'rb')
+        except FileNotFoundError:
+            cache_file = None
+            logger.info(f"Processing new image: {source_name}")
+        
+        if cache_file is not None:
+            with cache_file:
+                if os.fstat(cache_file.fileno()).st_mtime_ns == source_st.st_mtime_ns:
+                    try:
+                        cached_img = _read_frame(cache_file)
+                    except (ValueError, struct.error):
+                        cached_img = None
+                    if cached_img is not None:
+                        logger.info(f"Using cached processed image: {cache_filename}")
+                        self._record_entry(source_path, cache_filename, source_st)
+                        self._remember(mem_key, cached_img)
+                        return cached_img.copy()
+            logger.info(f"Cache outdated, reprocessing: {source_name}")
         
         # Process the image
         processed_img = self.processor.process_image(
-            str(source_path),
-            dither_mode=self.dither_mode,
+            source_path,
             contrast=self.contrast,
             brightness=self.brightness,
             sharpness=self.sharpness
         )
         
-        # Save to cache
-        processed_img.save(cache_path)
+        self._save_processed_image(source_path, processed_img)
+        self._remember(mem_key, processed_img)
+        
+        return processed_img.copy()
+    
+    def _record_entry(self, source_path, cache_filename, source_st):
+        """
+        Record which cache file holds a source's processed image
+        
+        Args:
+            source_path: Path to source image (str)
+            cache_filename: Cache filename in processed_dir
+            source_st: os.stat_result of the source the cache was built from
+        """
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+            (self._entry_key(source_path), cache_filename,
+             source_st.st_mtime_ns, source_st.st_size)
+        )
+    
+    def _remember(self, key, img):
+        """
+        Add a decoded image to the in-memory LRU, evicting the oldest entry
+        
+        Args:
+            key: (source path str, source mtime_ns) tuple
+            img: Processed PIL Image (callers get copies of it)
+        """
+        self._mem_cache[key] = img
+        self._mem_cache.move_to_end(key)
+        if len(self._mem_cache) > self.MEM_CACHE_SIZE:
+            self._mem_cache.popitem(last=False)
+    
+    def _save_processed_image(self, source_path, processed_img):
+        """
+        Save a processed image to the cache
+        
+        Args:
+            source_path: Path to source image
+            processed_img: PIL Image returned by ImageProcessor.process_image
+        """
+        cache_filename = self._get_cache_filename(source_path)
+        cache_path = os.path.join(self.processed_dir, cache_filename)
+        
+        # Raw pixels behind a small header, read back with a memory map
+        # instead of a PNG decode
+        header = FRAME_HEADER.pack(processed_img.width, processed_img.height,
+                                   processed_img.mode.encode())
+        self._write_atomic(cache_path, header, processed_img.tobytes())
+        
+        # Stamp the cache with the source mtime for the equality check
+        source_st = os.stat(source_path)
+        os.utime(cache_path, ns=(source_st.st_mtime_ns, source_st.st_mtime_ns))
+        self._record_entry(source_path, cache_filename, source_st)
         logger.info(f"Cached processed image: {cache_filename}")
+    
+    def get_display_buffer(self, source_path):
+        """
+        Get the packed 1-bit display buffer for an image (from cache or by processing)
+        Buffers are keyed by source path, mtime and processing settings, so a
+        cache hit skips decoding, processing and packing entirely
+        
+        Args:
+            source_path: Path to source image
+            
+        Returns:
+            Bytes-like buffer (width * height / 8 bytes) for EInkDisplay.display_image
+        """
+        source_path = os.fspath(source_path)
+        buffer_size = self.width * self.height // 8
+        
+        buffer_filename = self._get_buffer_filename(source_path)
+        buffer_path = os.path.join(self.processed_dir, buffer_filename)
+        
+        try:
+            with open(buffer_path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(buffer) == buffer_size:
+                logger.info(f"Using cached display buffer: {buffer_filename}")
+                return buffer
+            logger.warning(f"Display buffer has wrong size, rebuilding: {buffer_filename}")
+            buffer.close()
+        except (FileNotFoundError, ValueError):
+            # ValueError: mmap of an empty file
+            pass
+        
+        processed_img = self.get_processed_image(source_path)
+        return self._save_display_buffer(source_path, processed_img)
+    
+    def _save_display_buffer(self, source_path, processed_img):
+        """
+        Pack a processed image and save it to the display buffer cache
+        
+        Args:
+            source_path: Path to source image
+            processed_img: PIL Image returned by ImageProcessor.process_image
+            
+        Returns:
+            Packed display buffer (bytes)
+        """
+        buffer_filename = self._get_buffer_filename(source_path)
+        buffer_path = os.path.join(self.processed_dir, buffer_filename)
+        
+        # PIL packs '1' mode rows MSB first with white = 1, which is
+        # exactly the layout epd.getbuffer produces
+        buffer = processed_img.convert('1').tobytes()
+        
+        self._write_atomic(buffer_path, buffer)
+        self._db.execute("INSERT OR IGNORE INTO buffers VALUES (?)", (buffer_filename,))
+        logger.info(f"Cached display buffer: {buffer_filename}")
         
-        return processed_img
+        return buffer
+    
+    def _write_atomic(self, path, *chunks):
+        """
+        Write a cache file atomically so a reader never sees a partial file
+        
+        Args:
+            path: Destination path inside processed_dir
+            chunks: Bytes-like objects written in order
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.processed_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+    
+    def _get_buffer_filename(self, source_path):
+        """
+        Generate a display buffer filename from source file and settings
+        
+        Args:
+            source_path: Path to source image
+            
+        Returns:
+            Buffer filename (str)
+        """
+        key = '|'.join(str(part) for part in (
+            os.path.realpath(source_path),
+            os.stat(source_path).st_mtime_ns,
+            self._settings_key,
+        ))
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest() + '.bin'
+    
+    @functools.cached_property
+    def _settings_key(self):
+        """Processing settings as a string, part of every cache key"""
+        return '|'.join(str(part) for part in (
+            self.width,
+            self.height,
+            self.dither_mode,
+            self.contrast,
+            self.brightness,
+            self.sharpness,
+        ))
+    
+    def _entry_key(self, source_path):
+        """
+        Manifest key for a source image processed with these settings
+        
+        Args:
+            source_path: Path to source image
+            
+        Returns:
+            Key (str)
+        """
+        return f"{os.fspath(source_path)}|{self._settings_key}"
     
     def _get_cache_filename(self, source_path):
         """
-        Generate a cache filename based on source file
+        Generate a cache filename from the source file's content and the
+        processing settings. Renamed or re-uploaded copies of the same image
+        share one entry
         
         Args:
             source_path: Path to source image
@@ -107,23 +363,37 @@ class ImageTransfer:
         Returns:
             Cache filename (str)
         """
-        # Create a hash of the source filename for uniqueness
-        source_name = source_path.name
-        name_hash = hashlib.md5(source_name.encode()).hexdigest()[:8]
+        # The first 64 KiB plus the size is enough to tell photos apart
+        # without reading whole files on every lookup
+        with open(source_path, 'rb') as f:
+            head = f.read(self.CONTENT_KEY_BYTES)
+            size = os.fstat(f.fileno()).st_size
         
-        # Use original stem + hash + png extension
-        cache_name = f"{source_path.stem}_{name_hash}.png"
+        content_hash = hashlib.blake2b(head, digest_size=8)
+        content_hash.update(size.to_bytes(8, 'little'))
+        content_hash.update(self._settings_key.encode())
         
-        return cache_name
+        return content_hash.hexdigest() + '.frame'
     
     def clear_cache(self):
         """
-        Clear all cached processed images
+        Clear all cached processed images (everything in the manifest)
         """
+        self._mem_cache.clear()
+        
         count = 0
-        for cache_file in self.processed_dir.glob('*.png'):
-            cache_file.unlink()
-            count += 1
+        filenames = self._db.execute(
+            "SELECT filename FROM entries UNION SELECT filename FROM buffers"
+        ).fetchall()
+        for (filename,) in filenames:
+            try:
+                os.unlink(os.path.join(self.processed_dir, filename))
+                count += 1
+            except FileNotFoundError:
+                pass
+        
+        self._db.execute("DELETE FROM entries")
+        self._db.execute("DELETE FROM buffers")
         
         logger.info(f"Cleared {count} cached images")
         return count
@@ -131,17 +401,143 @@ class ImageTransfer:
     def preprocess_all(self, image_paths):
         """
         Preprocess a list of images (useful for startup)
+        Images are processed in parallel worker processes; results are
+        written to the cache by this process
         
         Args:
             image_paths: List of image paths to preprocess
         """
         logger.info(f"Preprocessing {len(image_paths)} images...")
         
-        for i, img_path in enumerate(image_paths):
+        # Skip images whose display buffer is already cached
+        pending = []
+        for img_path in image_paths:
+            try:
+                buffer_path = os.path.join(self.processed_dir,
+                                           self._get_buffer_filename(img_path))
+                if not os.path.exists(buffer_path):
+                    pending.append(img_path)
+            except OSError as e:
+                logger.error(f"Failed to preprocess {img_path}: {e}")
+        
+        if not pending:
+            logger.info("Preprocessing complete (all images cached)")
+            return
+        
+        workers = _preprocess_workers(len(pending))
+        args = (
+            [str(img_path) for img_path in pending],
+            repeat(self.width), repeat(self.height),
+            repeat(self.dither_mode), repeat(self.contrast),
+            repeat(self.brightness), repeat(self.sharpness),
+        )
+        
+        if workers > 1:
+            logger.info(f"Using {workers} worker processes")
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('fork')) as ex:
+                self._store_preprocessed(ex.map(_process_one, *args, chunksize=2),
+                                         len(pending))
+        else:
+            self._store_preprocessed(map(_process_one, *args), len(pending))
+        
+        logger.info("Preprocessing complete")
+    
+    def _store_preprocessed(self, results, total):
+        """
+        Write preprocess_all worker results to the cache as they arrive
+        
+        Args:
+            results: Iterable of (source_path, processed image, error) tuples
+            total: Number of results expected
+        """
+        for i, (img_path, processed_img, error) in enumerate(results):
+            if error is not None:
+                logger.error(f"Failed to preprocess {img_path}: {error}")
+                continue
+            
             try:
-                logger.info(f"Preprocessing {i+1}/{len(image_paths)}: {Path(img_path).name}")
-                self.get_processed_image(img_path)
+                logger.info(f"Preprocessed {i+1}/{total}: {os.path.basename(img_path)}")
+                self._save_processed_image(img_path, processed_img)
+                self._save_display_buffer(img_path, processed_img)
             except Exception as e:
                 logger.error(f"Failed to preprocess {img_path}: {e}")
+
+
+def _read_frame(f):
+    """
+    Load a processed image cache file written by _save_processed_image
+    
+    Args:
+        f: Cache file opened in binary mode
         
-        logger.info("Preprocessing complete")
\ No newline at end of file
+    Returns:
+        PIL Image
+        
+    Raises:
+        ValueError, struct.error: If the file is truncated or damaged
+    """
+    width, height, mode = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+    mode = mode.rstrip(b'\0').decode()
+    pixels = np.memmap(f, dtype=np.uint8, mode='r', offset=FRAME_HEADER.size)
+    return Image.frombuffer(mode, (width, height), pixels, 'raw', mode, 0, 1)
+
+
+# Per-worker ImageProcessor for preprocess_all
+_worker_processor = None
+
+
+def _process_one(source_path, width, height, dither_mode,
+                 contrast, brightness, sharpness):
+    """
+    Process a single image for preprocess_all (runs in a worker process)
+    
+    Args:
+        source_path: Path to source image (str)
+        width, height: Display size
+        dither_mode: Dithering algorithm to use
+        contrast, brightness, sharpness: Enhancement factors
+        
+    Returns:
+        Tuple of (source_path, processed PIL Image or None, error message or None)
+    """
+    global _worker_processor
+    
+    if (_worker_processor is None or
+            (_worker_processor.width, _worker_processor.height,
+             _worker_processor.dither_mode) != (width, height, dither_mode)):
+        _worker_processor = ImageProcessor(target_width=width, target_height=height,
+                                           dither_mode=dither_mode)
+    
+    try:
+        processed_img = _worker_processor.process_image(
+            source_path,
+            contrast=contrast,
+            brightness=brightness,
+            sharpness=sharpness
+        )
+        return source_path, processed_img, None
+    except Exception as e:
+        return source_path, None, str(e)
+
+
+def _preprocess_workers(count):
+    """
+    Number of worker processes to use for preprocess_all
+    Capped at 2 on boards with under 1 GB of RAM (Pi Zero 2) since
+    every worker holds full-size decoded images
+    
+    Args:
+        count: Number of images to process
+        
+    Returns:
+        Worker count (1 means process in this process)
+    """
+    workers = min(os.cpu_count() or 1, count, 4)
+    try:
+        total_memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        if total_memory < 1024 ** 3:
+            workers = min(workers, 2)
+    except (ValueError, OSError, AttributeError):
+        pass
+    return max(workers, 1)
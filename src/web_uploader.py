@@ -5,8 +5,15 @@ from flask_httpauth import HTTPBasicAuth
 from werkzeug.utils import secure_filename
 import os
 import json
+import hmac
 from pathlib import Path
 
+# orjson parses in C and straight from bytes, stdlib json also accepts bytes
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 app = Flask(__name__)
 app.secret_key = 'picture_frame_secret_key'
 auth = HTTPBasicAuth()
@@ -20,46 +27,98 @@ STATE_FILE = PROJECT_ROOT / 'current_state.json'
 AUTH_FILE = PROJECT_ROOT / 'config' / 'web_auth.json'
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'heic'}
+_ALLOWED_SUFFIXES = tuple(f'.{ext}' for ext in ALLOWED_EXTENSIONS)
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
 
+def read_json(path):
+    """Parse a JSON file"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
 # Load authentication
 def load_auth():
     try:
-        with open(AUTH_FILE, 'r') as f:
-            return json.load(f)
+        return read_json(AUTH_FILE)
     except:
         return {"username": "admin", "password": "changeme"}
 
 credentials = load_auth()
+_auth_user = credentials['username'].encode()
+_auth_password = credentials['password'].encode()
 
 @auth.verify_password
 def verify_password(username, password):
-    if username == credentials['username'] and password == credentials['password']:
+    # Constant-time compares against the credentials encoded once at startup
+    # (both run so a wrong username takes as long as a wrong password)
+    user_ok = hmac.compare_digest((username or '').encode(), _auth_user)
+    password_ok = hmac.compare_digest((password or '').encode(), _auth_password)
+    if user_ok and password_ok:
         return username
     return None
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
+
+# (st_mtime_ns, st_size) of the last parsed state file and its current_image
+_state_key = None
+_state_image = None
 
 def get_current_image():
-    """Get currently displaying image"""
+    """Get currently displaying image (state file only re-parsed when it changes)"""
+    global _state_key, _state_image
     try:
-        if STATE_FILE.exists():
-            with open(STATE_FILE, 'r') as f:
-                state = json.load(f)
-                return state.get('current_image')
+        st = os.stat(STATE_FILE)
+        key = (st.st_mtime_ns, st.st_size)
+        if key != _state_key:
+            state = read_json(STATE_FILE)
+            _state_key, _state_image = key, state.get('current_image')
+        return _state_image
     except:
         pass
     return None
 
+def save_upload(file, dest):
+    """Save an uploaded file, copying in-kernel when Werkzeug spooled it to disk"""
+    stream = file.stream
+    
+    # Werkzeug spools uploads over 500 KB to a temp file. Asking an in-memory
+    # SpooledTemporaryFile for fileno() would force it to disk first.
+    # _rolled is a private SpooledTemporaryFile attribute (set once it has
+    # moved to disk); other stream types don't have it and go straight to
+    # fileno(), which raises for in-memory streams
+    if getattr(stream, '_rolled', True):
+        try:
+            src_fd = stream.fileno()
+            stream.flush()
+            size = os.fstat(src_fd).st_size
+            dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            finally:
+                os.close(dst_fd)
+            if offset == size:
+                return
+            # sendfile stopped early, rewrite the whole file below
+        except (AttributeError, OSError, ValueError):
+            pass  # No real file descriptor or no sendfile, copy in Python
+    
+    stream.seek(0)
+    file.save(dest)
+
 def get_image_list():
-    """Get sorted list of images"""
-    if UPLOAD_FOLDER.exists():
-        images = [f for f in UPLOAD_FOLDER.iterdir() 
-                 if f.is_file() and allowed_file(f.name)]
-        images.sort()
-        return images
-    return []
+    """Get sorted list of image filenames"""
+    # scandir gets the file type from the directory listing, no stat per entry
+    try:
+        with os.scandir(UPLOAD_FOLDER) as entries:
+            return sorted(entry.name for entry in entries
+                          if entry.is_file() and allowed_file(entry.name))
+    except FileNotFoundError:
+        return []
 
 @app.route('/')
 @auth.login_required
@@ -68,11 +127,10 @@ def index():
     images = get_image_list()
     current_image = get_current_image()
     
-    image_names = [img.name for img in images]
     current_name = Path(current_image).name if current_image else None
     
     return render_template('upload.html', 
-                          images=image_names,
+                          images=images,
                           current_image=current_name,
                           image_count=len(images))
 
@@ -88,6 +146,10 @@ def upload_file():
     uploaded = 0
     errors = []
     
+    # If the whole request is under the limit, every file in it is too
+    check_sizes = (request.content_length is None or
+                   request.content_length > MAX_FILE_SIZE)
+    
     for file in files:
         if file and file.filename:
             # Validate file type
@@ -96,17 +158,18 @@ def upload_file():
                 continue
             
             # Validate file size
-            file.seek(0, os.SEEK_END)
-            size = file.tell()
-            file.seek(0)
-            
-            if size > MAX_FILE_SIZE:
-                errors.append(f'{file.filename}: Too large (max 20MB)')
-                continue
+            if check_sizes:
+                file.seek(0, os.SEEK_END)
+                size = file.tell()
+                file.seek(0)
+                
+                if size > MAX_FILE_SIZE:
+                    errors.append(f'{file.filename}: Too large (max 20MB)')
+                    continue
             
             # Save file
             filename = secure_filename(file.filename)
-            file.save(UPLOAD_FOLDER / filename)
+            save_upload(file, UPLOAD_FOLDER / filename)
             uploaded += 1
     
     if uploaded > 0:
@@ -124,10 +187,10 @@ def delete_file(filename):
     filename = secure_filename(filename)
     file_path = UPLOAD_FOLDER / filename
     
-    if file_path.exists():
+    try:
         file_path.unlink()
         flash(f'Deleted {filename}', 'success')
-    else:
+    except FileNotFoundError:
         flash(f'File not found', 'error')
     
     return redirect(url_for('index'))
@@ -137,8 +200,11 @@ def delete_file(filename):
 def get_current_image_preview():
     """Serve the currently displaying image"""
     current = get_current_image()
-    if current and Path(current).exists():
-        return send_file(current, mimetype='image/jpeg')
+    if current:
+        try:
+            return send_file(current, mimetype='image/jpeg')
+        except FileNotFoundError:
+            pass
     return "No image", 404
 
 if __name__ == '__main__':
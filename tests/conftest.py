@@ -0,0 +1,81 @@
+# tests/conftest.py
+#
+# Run with: pip install pytest && python -m pytest tests
+# (pytest is kept out of requirements.txt, which is what the Pi installs)
+
+import sys
+import os
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lib'))
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+QUEUE_DIR = PROJECT_ROOT / 'images' / 'queue'
+
+
+def pytest_addoption(parser):
+    parser.addoption('--emit-png', action='store_true', default=False,
+                     help='save dither test outputs as PNGs instead of raw dumps')
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _pillow_init():
+    """Register all of Pillow's codecs once for the whole session"""
+    from PIL import Image
+    Image.init()
+
+
+@pytest.fixture(scope="session")
+def emit_png(pytestconfig):
+    """True when the run was started with --emit-png"""
+    return pytestconfig.getoption('emit_png')
+
+
+@pytest.fixture(scope="session")
+def output_dir(pytestconfig, tmp_path_factory):
+    """Directory for test outputs that persists between runs (pytest's cache)"""
+    if getattr(pytestconfig, "cache", None) is None:
+        # Cache plugin disabled (-p no:cacheprovider), outputs don't persist
+        return tmp_path_factory.mktemp('image_processor')
+    return pytestconfig.cache.mkdir('image_processor')
+
+
+@pytest.fixture(scope="session")
+def processor():
+    """Shared ImageProcessor for the display size"""
+    from image_processor import ImageProcessor
+    return ImageProcessor()
+
+
+@pytest.fixture(scope="session")
+def slideshow():
+    """Looping Slideshow over images/queue, scanned and prefetched once (tests reset() it)"""
+    from slideshow import Slideshow
+    show = Slideshow(image_dir=str(QUEUE_DIR), loop=True)
+    if show.scan_images() == 0:
+        pytest.skip(f"No images found in {QUEUE_DIR} (supported: jpg, png, heic)")
+    # Readahead overlaps the SD card reads with the rest of the setup
+    show.prefetch()
+    return show
+
+
+@pytest.fixture(scope="session")
+def transfer(tmp_path_factory):
+    """ImageTransfer over images/queue with a throwaway processed dir"""
+    from transfer import ImageTransfer
+    return ImageTransfer(queue_dir=str(QUEUE_DIR),
+                         processed_dir=str(tmp_path_factory.mktemp('processed')))
+
+
+@pytest.fixture(scope="session")
+def epd_driver():
+    """Waveshare 4.2" V2 driver module, skips the test when not on the Pi"""
+    try:
+        from waveshare_epd import epd4in2_V2
+    except Exception as e:
+        # The driver raises RuntimeError (not ImportError) without SPI/GPIO
+        pytest.skip(f"e-Paper driver unavailable: {e}")
+    return epd4in2_V2
@@ -1,33 +1,99 @@
 import sys
-import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import time
+from types import SimpleNamespace
 
-from display_controller import EInkDisplay
+import pytest
 from PIL import Image, ImageDraw
-import time
 
 
-def main():
-    """Test the display controller"""
-    print("=" * 50)
-    print("Testing EInkDisplay Controller")
-    print("=" * 50)
+class _StubEPD:
+    """Records the driver calls EInkDisplay makes"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def init(self):
+        self.calls.append('init')
+    
+    def send_command(self, command):
+        self.calls.append(('cmd', command))
+    
+    def send_data(self, data):
+        self.calls.append(('data', data))
+    
+    def display(self, buffer):
+        self.calls.append('display')
+    
+    def display_Partial(self, buffer):
+        self.calls.append('display_Partial')
+    
+    def sleep(self):
+        self.calls.append('sleep')
+
+
+def _stub_display(full_refresh_every):
+    """EInkDisplay wired to a stub driver, already initialized"""
+    from display_controller import EInkDisplay
+    
+    display = EInkDisplay(full_refresh_every=full_refresh_every)
+    display.epd = _StubEPD()
+    display._driver = SimpleNamespace(epdconfig=SimpleNamespace(module_exit=lambda cleanup: None))
+    display.init()
+    display.epd.calls.clear()
+    return display
+
+
+# Registers display_Partial changes, set back to their epd.init() values
+RESTORE_FULL = [('cmd', 0x21), ('data', 0x40), ('data', 0x00), ('cmd', 0x3C), ('data', 0x05)]
+
+
+def test_partial_refresh_schedule():
+    """Every full_refresh_every-th partial frame is a full refresh, preceded by a register restore"""
+    display = _stub_display(full_refresh_every=3)
+    frame = bytes(400 * 300 // 8)
+    
+    for _ in range(7):
+        display.display_image(frame, partial=True)
+    
+    assert display.epd.calls == [
+        'display',                                  # first frame after init
+        'display_Partial', 'display_Partial',
+        *RESTORE_FULL, 'display',                   # scheduled full refresh
+        'display_Partial', 'display_Partial',
+        *RESTORE_FULL, 'display',
+    ]
+    assert 'init' not in display.epd.calls
+
+
+def test_full_refresh_right_after_full_skips_restore():
+    """A full refresh that follows a full refresh needs no register restore"""
+    display = _stub_display(full_refresh_every=3)
+    frame = bytes(400 * 300 // 8)
+    
+    display.display_image(frame)
+    display.display_image(frame)
+    display.clear()
+    
+    assert display.epd.calls == ['display', 'display', 'display']
+
+
+def test_display_controller(epd_driver):
+    """Drive the display through EInkDisplay (needs the Pi)"""
+    from display_controller import EInkDisplay
     
     # Create display controller
     display = EInkDisplay()
     
     try:
         # Initialize
-        print("\n1. Initializing display...")
         display.init()
+        assert display.initialized
         
         # Clear
-        print("\n2. Clearing display...")
         display.clear()
         time.sleep(2)
         
         # Create test image
-        print("\n3. Creating test image...")
         img = Image.new('1', (400, 300), 255)  # White background
         draw = ImageDraw.Draw(img)
         
@@ -38,25 +104,9 @@ def main():
         draw.ellipse((170, 70, 270, 120), outline=0, width=2)
         draw.line((10, 140, 270, 140), fill=0, width=3)
         
-        # Display it
-        print("\n4. Displaying test image...")
+        # Display it, image stays for 5 seconds
         display.display_image(img)
-        
-        print("\n5. Image will display for 5 seconds...")
         time.sleep(5)
-        
-        # Sleep
-        print("\n6. Putting display to sleep...")
-        display.sleep()
-        
-        print("\n" + "=" * 50)
-        print("Test completed successfully!")
-        print("=" * 50)
-        
-    except Exception as e:
-        print(f"\nTest failed with error: {e}")
-        import traceback
-        traceback.print_exc()
     finally:
         # Ensure cleanup
         if display.initialized:
@@ -64,4 +114,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(pytest.main([__file__] + sys.argv[1:]))
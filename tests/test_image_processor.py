@@ -1,21 +1,38 @@
 import sys
 import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from image_processor import ImageProcessor
+import pytest
+
 from PIL import Image, ImageDraw
-import time
+import numpy as np
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 
-def create_test_image():
-    """Create a test image with gradients for testing dithering"""
-    img = Image.new('RGB', (800, 600), 'white')
-    draw = ImageDraw.Draw(img)
+# Bump when create_test_image draws something different
+TEST_IMAGE_VERSION = '800x600-grad256-v1'
+
+# Dither outputs older than any of these are redone (missing ones are ignored,
+# _dither.so only exists once the C kernel has been built). This file is one
+# too: it holds the enhancement settings and the output format
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+PROC_SRCS = [os.path.join(SRC_DIR, name)
+             for name in ('image_processor.py', '_dither.c', '_dither.so')] + [__file__]
+
+
+def create_test_image(out_dir):
+    """Create a test image with gradients for testing dithering (reused if already saved)"""
+    key = hashlib.sha1(TEST_IMAGE_VERSION.encode()).hexdigest()[:12]
+    test_img_path = os.path.join(out_dir, f'test_gradient_{key}.png')
+    if os.path.exists(test_img_path):
+        return test_img_path
     
-    # Create gradient
-    for i in range(256):
-        gray = i
-        draw.rectangle([(i*3, 0), (i*3+3, 200)], fill=(gray, gray, gray))
+    # Create gradient: 256 gray steps, 3 px wide, rows 0-200
+    arr = np.full((600, 800, 3), 255, dtype=np.uint8)
+    arr[:201, :768] = np.repeat(np.arange(256, dtype=np.uint8), 3)[:, None]
+    img = Image.fromarray(arr, 'RGB')
+    draw = ImageDraw.Draw(img)
     
     # Add some text
     draw.text((50, 250), 'Dithering Test Image', fill='black')
@@ -25,56 +42,159 @@ def create_test_image():
     draw.rectangle([(300, 300), (500, 500)], fill='darkgray')
     
     # Save it
-    test_img_path = os.path.join(os.path.dirname(__file__), '..', 'images', 'test_gradient.png')
     os.makedirs(os.path.dirname(test_img_path), exist_ok=True)
     img.save(test_img_path)
     return test_img_path
 
 
-def main():
-    """Test the image processor with different dithering modes"""
-    print("=" * 50)
-    print("Testing ImageProcessor")
-    print("=" * 50)
+def _output_path(mode, out_dir, emit_png=False):
+    """Where the output for one dither mode goes"""
+    # Raw pixels (one byte each) unless PNGs were asked for,
+    # no point deflating files that are only checked
+    ext = 'png' if emit_png else 'raw'
+    return os.path.join(out_dir, f'processed_{mode}.{ext}')
+
+
+def _is_up_to_date(output_path, test_img):
+    """True if the output is newer than the test image and every processor source"""
+    try:
+        out_mtime = os.path.getmtime(output_path)
+    except FileNotFoundError:
+        return False
+    deps = [test_img] + [path for path in PROC_SRCS if os.path.exists(path)]
+    return all(out_mtime > os.path.getmtime(path) for path in deps)
+
+
+def _check_output(output_path):
+    """Assert a saved dither output is a full 400x300 1-bit frame"""
+    if output_path.endswith('.png'):
+        with Image.open(output_path) as img:
+            assert img.size == (400, 300)
+            assert img.mode == '1'
+    else:
+        # One byte per pixel
+        assert os.path.getsize(output_path) == 400 * 300
+
+
+def _run_mode(mode, enhanced, out_dir, emit_png=False):
+    """Dither the prepared test frame with one mode (runs in a worker process)"""
+    from image_processor import ImageProcessor
+    
+    processed = ImageProcessor().apply_dither(enhanced, mode)
     
-    # Create processor
-    processor = ImageProcessor()
+    output_path = _output_path(mode, out_dir, emit_png)
+    if emit_png:
+        processed.save(output_path)
+    else:
+        np.asarray(processed).tofile(output_path)
     
-    # Create or use test image
-    print("\n1. Creating test image...")
-    test_img = create_test_image()
-    print(f"Test image created: {test_img}")
+    return output_path, processed.size, processed.mode
+
+
+def test_dither_modes(processor, emit_png, output_dir):
+    """Every dither mode turns the test image into a 1-bit display frame
     
-    # Test different dithering modes
+    Run with --emit-png to save viewable PNGs instead of raw dumps. Outputs
+    go in pytest's cache dir (.pytest_cache/d/image_processor).
+    Modes whose output is newer than the test image, the processor sources
+    (image_processor.py, _dither.c/.so) and this file are not rerun, but
+    their saved outputs are still checked. Delete the outputs to force a
+    full sweep
+    """
+    out_dir = str(output_dir)
+    test_img = create_test_image(out_dir)
+    
+    # Test different dithering modes, each one in its own process
     dither_modes = ['floyd-steinberg', 'atkinson', 'ordered', 'threshold']
     
+    stale = [mode for mode in dither_modes
+             if not _is_up_to_date(_output_path(mode, out_dir, emit_png), test_img)]
+    
+    if stale:
+        # Resize and enhance once, only the dithering differs per mode
+        enhanced = processor.prepare_enhanced(
+            test_img,
+            contrast=1.3,
+            brightness=1.1,
+            sharpness=1.2
+        )
+        
+        with ProcessPoolExecutor(max_workers=len(stale)) as ex:
+            results = list(ex.map(_run_mode, stale, repeat(enhanced), repeat(out_dir),
+                                  repeat(emit_png)))
+        
+        for output_path, size, mode in results:
+            assert size == (400, 300)
+            assert mode == '1'
+    
+    # Outputs of skipped modes are still checked
     for mode in dither_modes:
-        print(f"\n2. Testing {mode} dithering...")
-        try:
-            processed = processor.process_image(
-                test_img,
-                dither_mode=mode,
-                contrast=1.3,
-                brightness=1.1,
-                sharpness=1.2
-            )
-            
-            # Save processed image
-            output_path = os.path.join(
-                os.path.dirname(__file__), '..', 'images', 
-                f'processed_{mode}.png'
-            )
-            processed.save(output_path)
-            print(f"Saved: {output_path}")
-            print(f"Size: {processed.size}, Mode: {processed.mode}")
-            
-        except Exception as e:
-            print(f"Failed with {mode}: {e}")
-    
-    print("\n" + "=" * 50)
-    print("Test complete! Check images/ folder for results")
-    print("=" * 50)
+        _check_output(_output_path(mode, out_dir, emit_png))
+
+
+# Display size plus edge cases for the bounds-checked edge pixels
+KERNEL_SHAPES = [(300, 400), (1, 1), (2, 2), (1, 5), (5, 1), (7, 3)]
+
+
+def _kernel_input(shape):
+    """Random int16 working buffer like _atkinson_dither builds"""
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=shape).astype(np.int16)
+
+
+@pytest.mark.parametrize('shape', KERNEL_SHAPES)
+def test_atkinson_numba_matches_python(shape, monkeypatch):
+    """The Numba Atkinson kernel and its pure Python source give bit-identical results"""
+    import image_processor
+    
+    src = _kernel_input(shape)
+    h, w = shape
+    
+    jit = src.copy()
+    image_processor._atkinson_numba(jit, h, w)
+    
+    # Without numba the decorated functions already are plain Python
+    python = src.copy()
+    py_func = getattr(image_processor._atkinson_numba, 'py_func',
+                      image_processor._atkinson_numba)
+    monkeypatch.setattr(image_processor, '_atkinson_pixel',
+                        getattr(image_processor._atkinson_pixel, 'py_func',
+                                image_processor._atkinson_pixel))
+    py_func(python, h, w)
+    
+    np.testing.assert_array_equal(jit, python)
+
+
+@pytest.mark.parametrize('shape', KERNEL_SHAPES)
+def test_atkinson_c_matches_numba(shape):
+    """The C Atkinson kernel and the Numba one give bit-identical results"""
+    import ctypes
+    import image_processor
+    
+    if image_processor._dither_lib is None:
+        pytest.skip("C kernel not built (see src/_dither.c)")
+    
+    src = _kernel_input(shape)
+    h, w = shape
+    
+    native = src.copy()
+    image_processor._dither_lib.atkinson(
+        native.ctypes.data_as(ctypes.POINTER(ctypes.c_int16)), h, w
+    )
+    
+    jit = src.copy()
+    image_processor._atkinson_numba(jit, h, w)
+    
+    np.testing.assert_array_equal(native, jit)
+
+
+def test_unknown_dither_mode_rejected():
+    """An unknown default dither mode fails when the processor is built"""
+    from image_processor import ImageProcessor
+    
+    with pytest.raises(ValueError):
+        ImageProcessor(dither_mode='halftone')
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(pytest.main([__file__] + sys.argv[1:]))
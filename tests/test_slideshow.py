@@ -1,54 +1,39 @@
 import sys
 import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from slideshow import Slideshow
+import pytest
 
 
-def main():
-    """Test the slideshow manager"""
-    print("=" * 50)
-    print("Testing Slideshow Manager")
-    print("=" * 50)
-    
-    # Get project root directory
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    queue_dir = os.path.join(project_root, 'images', 'queue')
-    
-    # Create slideshow with absolute path
-    slideshow = Slideshow(
-        image_dir=queue_dir,
-        loop=True
-    )
-    
-    # Scan for images
-    print(f"\n1. Scanning for images in {queue_dir}...")
-    count = slideshow.scan_images()
-    print(f"Found {count} images")
-    
-    if count == 0:
-        print(f"\nNo images found in {queue_dir}")
-        print("Supported formats: jpg, png, heic")
-        return
-    
-    # Test getting next images
-    print("\n2. Testing image iteration...")
-    for i in range(min(count + 2, 10)):  # Test a few iterations including loop
-        img_path = slideshow.get_next_image()
-        print(f"  Image {i+1}/{count}: {os.path.basename(img_path)}")
-    
-    # Test reset
-    print("\n3. Testing reset...")
+def test_slideshow_iteration(slideshow):
+    """Iterating past the end loops back to the start"""
     slideshow.reset()
-    img_path = slideshow.get_next_image()
-    print(f"  After reset: {os.path.basename(img_path)}")
-    
-    print(f"\n4. Current position: {slideshow.get_current_index()} of {slideshow.get_image_count()}")
+    count = slideshow.get_image_count()
+    
+    # A few iterations including loop. Every path starts with the queue dir,
+    # so the name is a slice (basename only if the prefix doesn't match)
+    prefix = str(slideshow.image_dir) + os.sep
+    prefix_len = len(prefix)
+    names = []
+    basename = os.path.basename
+    append = names.append
+    for img_path in slideshow.get_next_images(min(count + 2, 10)):
+        append(img_path[prefix_len:] if img_path.startswith(prefix) else basename(img_path))
+    
+    assert len(names) == min(count + 2, 10)
+    assert names == [names[i % count] for i in range(len(names))]
+    assert len(set(names[:count])) == count
+
+
+def test_slideshow_reset(slideshow):
+    """reset() goes back to the first image"""
+    slideshow.reset()
+    first = slideshow.get_next_image()
+    slideshow.get_next_image()
     
-    print("\n" + "=" * 50)
-    print("Slideshow test complete!")
-    print("=" * 50)
+    slideshow.reset()
+    assert slideshow.get_next_image() == first
+    assert slideshow.get_current_index() == 1 % slideshow.get_image_count()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(pytest.main([__file__] + sys.argv[1:]))
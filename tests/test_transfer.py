@@ -1,59 +1,70 @@
 import sys
 import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from transfer import ImageTransfer
-from slideshow import Slideshow
+import pytest
 
 
-def main():
-    """Test the image transfer/processing pipeline"""
-    print("=" * 50)
-    print("Testing Image Transfer")
-    print("=" * 50)
+def test_processed_image_is_cached(slideshow, transfer, monkeypatch):
+    """Processing an image once leaves a cache entry the next lookup uses"""
+    from transfer import ImageTransfer
     
-    # Get project root directory
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    queue_dir = os.path.join(project_root, 'images', 'queue')
-    processed_dir = os.path.join(project_root, 'images', 'processed')
+    slideshow.reset()
+    img_path = slideshow.get_next_image()
     
-    # Create components
-    slideshow = Slideshow(image_dir=queue_dir)
-    transfer = ImageTransfer(queue_dir=queue_dir, processed_dir=processed_dir)
+    processed = transfer.get_processed_image(img_path)
+    assert processed.size == (400, 300)
+    assert processed.mode == '1'
     
-    # Scan for images
-    print(f"\n1. Scanning for images in {queue_dir}...")
-    count = slideshow.scan_images()
-    print(f"Found {count} images")
+    # Same instance: served from the in-memory cache, without the manifest
+    with monkeypatch.context() as m:
+        m.setattr(transfer, '_db', None)
+        processed2 = transfer.get_processed_image(img_path)
+    assert processed2.tobytes() == processed.tobytes()
     
-    if count == 0:
-        print(f"\nNo images found in {queue_dir}")
-        return
+    # Fresh instance on the same dir: served from the frame on disk,
+    # so its (lazily created) processor is never built
+    reloaded = ImageTransfer(queue_dir=transfer.queue_dir,
+                             processed_dir=transfer.processed_dir)
+    assert reloaded.get_processed_image(img_path).tobytes() == processed.tobytes()
+    assert 'processor' not in reloaded.__dict__
     
-    # Process first image
-    print("\n2. Processing first image...")
-    img_path = slideshow.get_next_image()
-    print(f"Processing: {os.path.basename(img_path)}")
+    with os.scandir(transfer.processed_dir) as entries:
+        frames = sum(1 for entry in entries if entry.name.endswith('.frame'))
+    assert frames == 1
+
+
+def test_settings_change_reprocesses(slideshow, tmp_path):
+    """Cached frames and buffers are only reused with the settings they were made with"""
+    from transfer import ImageTransfer
     
-    processed = transfer.get_processed_image(img_path)
-    print(f"Processed image: {processed.size}, mode: {processed.mode}")
+    slideshow.reset()
+    img_path = slideshow.get_next_image()
     
-    # Process again (should use cache)
-    print("\n3. Processing same image again (should use cache)...")
-    processed2 = transfer.get_processed_image(img_path)
-    print(f"Second load: {processed2.size}, mode: {processed2.mode}")
+    first = ImageTransfer(queue_dir=slideshow.image_dir, processed_dir=tmp_path,
+                          dither_mode='atkinson')
+    atkinson = first.get_processed_image(img_path).tobytes()
+    atkinson_buffer = bytes(first.get_display_buffer(img_path))
     
-    # Check cache
-    print(f"\n4. Cache location: {processed_dir}")
-    cache_files = os.listdir(processed_dir)
-    print(f"Cached files: {len(cache_files)}")
-    for f in cache_files[:5]:  # Show first 5
-        print(f"  - {f}")
+    second = ImageTransfer(queue_dir=slideshow.image_dir, processed_dir=tmp_path,
+                           dither_mode='threshold', contrast=2.0)
+    assert second.get_processed_image(img_path).tobytes() != atkinson
+    assert bytes(second.get_display_buffer(img_path)) != atkinson_buffer
+
+
+def test_unknown_dither_mode_rejected(tmp_path):
+    """A bad dither mode fails when ImageTransfer is built, not on first use"""
+    from transfer import ImageTransfer
     
-    print("\n" + "=" * 50)
-    print("Transfer test complete!")
-    print("=" * 50)
+    with pytest.raises(ValueError):
+        ImageTransfer(processed_dir=tmp_path, dither_mode='atkinsn')
+
+
+def test_display_buffer_size(slideshow, transfer):
+    """Display buffers are packed 1-bit, 8 pixels per byte"""
+    slideshow.reset()
+    buffer = transfer.get_display_buffer(slideshow.get_next_image())
+    assert len(buffer) == 400 * 300 // 8
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(pytest.main([__file__] + sys.argv[1:]))